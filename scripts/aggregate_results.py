@@ -5,134 +5,218 @@ Handles both CLI and WASM benchmark results.
 """
 
 import argparse
-import json
 import csv
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from statistics import fmean
 
+from cpu_affinity import available_cpus
+from json_io import dumps_json, loads_json
+
+
+# Buffer size for summary output files
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# Fields kept from each per-benchmark result file. The per-iteration arrays
+# stay on disk; the summary references them through "source".
+RESULT_FIELDS = (
+    "platform", "dataset", "method", "cpu", "browser", "sequences", "sites",
+    "parallelIterations", "statistics"
+)
+
+
+def project_result(data: dict, source: Path) -> dict:
+    """Reduce a loaded result to the fields used by the summary writers."""
+    result = {field: data[field] for field in RESULT_FIELDS if field in data}
+    result["source"] = str(source)
+    # (dataset, method, cpu or browser) lookup key, built once per result
+    config = data["cpu"] if "cpu" in data else data.get("browser", "")
+    result["_key"] = (data.get("dataset", ""), data.get("method", ""), str(config))
+    return result
+
+
+def _load_one(json_file: Path) -> dict | None:
+    """Load and project a single result file, or return None if it is unreadable."""
+    try:
+        return project_result(loads_json(json_file.read_bytes()), json_file)
+    except Exception as e:
+        print(f"Warning: Could not load {json_file}: {e}")
+        return None
+
+
+def _load_shard(json_files: list[Path]) -> list[dict]:
+    """Load and project one shard of result files in a worker process."""
+    return [r for r in map(_load_one, json_files) if r is not None]
+
+
+def _load_sharded(json_files: list[Path], workers: int) -> list[dict]:
+    """Load result files across a process pool, one shard per worker."""
+    shards = [[] for _ in range(workers)]
+    for json_file in json_files:
+        shards[zlib.crc32(json_file.name.encode()) % workers].append(json_file)
 
-def load_results(input_dir: Path) -> list[dict]:
-    """Load all JSON result files from a directory."""
     results = []
-    if input_dir.exists():
-        for json_file in input_dir.glob("*.json"):
-            try:
-                with open(json_file) as f:
-                    results.append(json.load(f))
-            except Exception as e:
-                print(f"Warning: Could not load {json_file}: {e}")
+    with Pool(workers) as pool:
+        for shard_results in pool.imap_unordered(_load_shard, [s for s in shards if s]):
+            results.extend(shard_results)
     return results
 
 
-def generate_summary(cli_results: list[dict], wasm_results: list[dict]) -> dict:
+def load_results(input_dir: Path, processes: int = 1) -> list[dict]:
+    """Load all JSON result files from a directory.
+
+    Files are parsed on a thread pool, or sharded across `processes` worker
+    processes when more than one is requested.
+    """
+    if not input_dir.exists():
+        return []
+
+    # Submit reads in inode order so the filesystem sees mostly sequential access;
+    # the directory entries already carry the inode, so this needs no extra stat().
+    with os.scandir(input_dir) as entries:
+        json_entries = [e for e in entries if e.name.endswith(".json") and e.is_file()]
+    json_entries.sort(key=lambda e: e.inode())
+    json_files = [Path(e.path) for e in json_entries]
+
+    cpus = available_cpus()
+    if processes > 1:
+        results = _load_sharded(json_files, min(processes, cpus))
+    else:
+        with ThreadPoolExecutor(max_workers=cpus) as executor:
+            results = [r for r in executor.map(_load_one, json_files) if r is not None]
+    results.sort(key=lambda r: r["source"])
+    return results
+
+
+def load_legacy_results(input_dir: Path, processes: int = 1) -> tuple[list[dict], list[dict]]:
+    """Load a legacy single results directory and split it into (cli, wasm)."""
+    cli_results = []
+    wasm_results = []
+    for r in load_results(input_dir, processes):
+        if r.get("platform") == "wasm":
+            wasm_results.append(r)
+        else:
+            cli_results.append(r)
+    return cli_results, wasm_results
+
+
+def _public_fields(result: dict) -> dict:
+    """Drop internal (underscore-prefixed) fields before serializing a result."""
+    return {k: v for k, v in result.items() if not k.startswith("_")}
+
+
+def generate_summary(cli_results: list[dict], wasm_results: list[dict], generated: str) -> dict:
     """Generate summary statistics."""
     all_results = cli_results + wasm_results
 
     summary = {
-        "generated": datetime.utcnow().isoformat() + "Z",
+        "generated": generated,
         "total_benchmarks": len(all_results),
         "cli_benchmarks": len(cli_results),
         "wasm_benchmarks": len(wasm_results),
         "datasets": sorted(set(r.get("dataset", "") for r in all_results)),
         "methods": sorted(set(r.get("method", "") for r in all_results)),
-        "cli_results": cli_results,
-        "wasm_results": wasm_results
+        "cli_results": [_public_fields(r) for r in cli_results],
+        "wasm_results": [_public_fields(r) for r in wasm_results]
     }
     return summary
 
 
-def write_markdown(cli_results: list[dict], wasm_results: list[dict], output_path: Path):
+def write_markdown(cli_results: list[dict], wasm_results: list[dict], output_path: Path, generated: str):
     """Write markdown summary with CLI vs WASM comparison."""
+    buf = bytearray()
+    buf += b"# HyPhy Benchmark Results\n\n"
+    buf += f"**Generated:** {generated}\n\n".encode()
+    buf += f"- CLI benchmarks: {len(cli_results)}\n".encode()
+    buf += f"- WASM benchmarks: {len(wasm_results)}\n\n".encode()
+
+    # Single pass over all results: collect datasets/methods, the first
+    # seq×sites seen per dataset, mean runtimes keyed by configuration, and
+    # (CPU=1, WASM) mean pairs for the overhead summary. CLI results are
+    # processed first so each WASM result can be paired as it is seen.
+    datasets = set()
+    methods = set()
+    seq_sites = {}
+    cli_lookup = {}
+    wasm_lookup = {}
+    matched = {}
+    for lookup, results in ((cli_lookup, cli_results), (wasm_lookup, wasm_results)):
+        for r in results:
+            key = r["_key"]
+            ds, method, _ = key
+            datasets.add(ds)
+            methods.add(method)
+            if ds not in seq_sites:
+                seq_sites[ds] = f"{r.get('sequences', '?')}×{r.get('sites', '?')}"
+            mean = r.get("statistics", {}).get("mean")
+            if mean:
+                lookup[key] = mean
+                if lookup is wasm_lookup:
+                    cpu1 = cli_lookup.get((ds, method, "1"))
+                    if cpu1:
+                        matched[key] = (cpu1, mean)
+
+    # Write comparison table for each method
+    for method in sorted(methods):
+        buf += f"## {method.upper()}\n\n".encode()
+        buf += "| Dataset | Seq×Sites | CPU=1 | CPU=all | WASM | WASM vs CPU=1 |\n".encode()
+        buf += b"|---------|-----------|-------|---------|------|---------------|\n"
+
+        for ds in sorted(datasets):
+            cpu1 = cli_lookup.get((ds, method, "1"))
+            cpu_all = cli_lookup.get((ds, method, "0")) or cli_lookup.get((ds, method, "all"))
+            wasm = wasm_lookup.get((ds, method, "chromium"))
+
+            cpu1_str = f"{cpu1:.0f}ms" if cpu1 else "-"
+            cpu_all_str = f"{cpu_all:.0f}ms" if cpu_all else "-"
+            wasm_str = f"{wasm:.0f}ms" if wasm else "-"
+
+            # Calculate overhead
+            if cpu1 and wasm:
+                overhead = ((wasm - cpu1) / cpu1) * 100
+                overhead_str = f"+{overhead:.0f}%" if overhead > 0 else f"{overhead:.0f}%"
+            else:
+                overhead_str = "-"
+
+            buf += f"| {ds} | {seq_sites.get(ds, '')} | {cpu1_str} | {cpu_all_str} | {wasm_str} | {overhead_str} |\n".encode()
+
+        buf += b"\n"
+
+    # Summary statistics
+    buf += b"## Summary\n\n"
+
+    if matched:
+        overheads = [((wasm_time - cpu1_time) / cpu1_time) * 100 for cpu1_time, wasm_time in matched.values()]
+        avg_overhead = fmean(overheads)
+        buf += f"- **Average WASM overhead vs single-threaded:** {avg_overhead:+.0f}%\n".encode()
+        buf += f"- **Min overhead:** {min(overheads):+.0f}%\n".encode()
+        buf += f"- **Max overhead:** {max(overheads):+.0f}%\n".encode()
 
-    with open(output_path, "w") as f:
-        f.write("# HyPhy Benchmark Results\n\n")
-        f.write(f"**Generated:** {datetime.utcnow().isoformat()}Z\n\n")
-        f.write(f"- CLI benchmarks: {len(cli_results)}\n")
-        f.write(f"- WASM benchmarks: {len(wasm_results)}\n\n")
-
-        # Get all datasets and methods
-        datasets = sorted(set(r.get("dataset", "") for r in cli_results + wasm_results))
-        methods = sorted(set(r.get("method", "") for r in cli_results + wasm_results))
-
-        # Build lookup tables
-        cli_lookup = {}
-        for r in cli_results:
-            key = (r.get("dataset"), r.get("method"), str(r.get("cpu", "")))
-            if r.get("statistics", {}).get("mean"):
-                cli_lookup[key] = r["statistics"]["mean"]
-
-        wasm_lookup = {}
-        for r in wasm_results:
-            key = (r.get("dataset"), r.get("method"), r.get("browser", ""))
-            if r.get("statistics", {}).get("mean"):
-                wasm_lookup[key] = r["statistics"]["mean"]
-
-        # Write comparison table for each method
-        for method in methods:
-            f.write(f"## {method.upper()}\n\n")
-            f.write("| Dataset | Seq×Sites | CPU=1 | CPU=all | WASM | WASM vs CPU=1 |\n")
-            f.write("|---------|-----------|-------|---------|------|---------------|\n")
-
-            for ds in datasets:
-                # Find seq×sites
-                seq_sites = ""
-                for r in cli_results + wasm_results:
-                    if r.get("dataset") == ds:
-                        seq_sites = f"{r.get('sequences', '?')}×{r.get('sites', '?')}"
-                        break
-
-                cpu1 = cli_lookup.get((ds, method, "1"))
-                cpu_all = cli_lookup.get((ds, method, "0")) or cli_lookup.get((ds, method, "all"))
-                wasm = wasm_lookup.get((ds, method, "chromium"))
-
-                cpu1_str = f"{cpu1:.0f}ms" if cpu1 else "-"
-                cpu_all_str = f"{cpu_all:.0f}ms" if cpu_all else "-"
-                wasm_str = f"{wasm:.0f}ms" if wasm else "-"
-
-                # Calculate overhead
-                if cpu1 and wasm:
-                    overhead = ((wasm - cpu1) / cpu1) * 100
-                    overhead_str = f"+{overhead:.0f}%" if overhead > 0 else f"{overhead:.0f}%"
-                else:
-                    overhead_str = "-"
-
-                f.write(f"| {ds} | {seq_sites} | {cpu1_str} | {cpu_all_str} | {wasm_str} | {overhead_str} |\n")
-
-            f.write("\n")
-
-        # Summary statistics
-        f.write("## Summary\n\n")
-
-        if wasm_lookup and cli_lookup:
-            overheads = []
-            for (ds, method, browser), wasm_time in wasm_lookup.items():
-                cpu1_time = cli_lookup.get((ds, method, "1"))
-                if cpu1_time and wasm_time:
-                    overheads.append(((wasm_time - cpu1_time) / cpu1_time) * 100)
-
-            if overheads:
-                avg_overhead = sum(overheads) / len(overheads)
-                f.write(f"- **Average WASM overhead vs single-threaded:** {avg_overhead:+.0f}%\n")
-                f.write(f"- **Min overhead:** {min(overheads):+.0f}%\n")
-                f.write(f"- **Max overhead:** {max(overheads):+.0f}%\n")
+    output_path.write_bytes(buf)
 
 
 def write_csv(cli_results: list[dict], wasm_results: list[dict], output_path: Path):
     """Write CSV summary."""
-    with open(output_path, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "platform", "dataset", "method", "cpu_or_browser", "sequences", "sites",
-            "mean_ms", "std_ms", "se_ms", "min_ms", "max_ms", "n"
-        ])
-
-        for r in cli_results:
+    rows = [[
+        "platform", "dataset", "method", "cpu_or_browser", "sequences", "sites",
+        "mean_ms", "std_ms", "se_ms", "min_ms", "max_ms", "n"
+    ]]
+
+    for platform, config_field, results in (
+        ("cli", "cpu", cli_results),
+        ("wasm", "browser", wasm_results),
+    ):
+        for r in results:
             stats = r.get("statistics", {})
-            writer.writerow([
-                "cli",
+            rows.append([
+                platform,
                 r.get("dataset", ""),
                 r.get("method", ""),
-                r.get("cpu", ""),
+                r.get(config_field, ""),
                 r.get("sequences", ""),
                 r.get("sites", ""),
                 stats.get("mean", ""),
@@ -143,22 +227,8 @@ def write_csv(cli_results: list[dict], wasm_results: list[dict], output_path: Pa
                 stats.get("n", 0)
             ])
 
-        for r in wasm_results:
-            stats = r.get("statistics", {})
-            writer.writerow([
-                "wasm",
-                r.get("dataset", ""),
-                r.get("method", ""),
-                r.get("browser", ""),
-                r.get("sequences", ""),
-                r.get("sites", ""),
-                stats.get("mean", ""),
-                stats.get("stdDev", ""),
-                stats.get("standardError", ""),
-                stats.get("min", ""),
-                stats.get("max", ""),
-                stats.get("n", 0)
-            ])
+    with open(output_path, "w", buffering=OUTPUT_BUFFER_SIZE, newline="") as f:
+        csv.writer(f).writerows(rows)
 
 
 def main():
@@ -169,35 +239,37 @@ def main():
     parser.add_argument("--output-md", required=True, help="Output markdown file")
     parser.add_argument("--output-csv", required=True, help="Output CSV file")
     parser.add_argument("--output-json", required=True, help="Output JSON file")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Parse result files across this many worker processes, capped at the "
+                             "CPUs available to this job (default: 1, threads in one process)")
+    parser.add_argument("--pretty", action="store_true", help="Indent the JSON summary for reading")
 
     args = parser.parse_args()
 
+    # One timestamp for every output of this run
+    generated = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
     # Load results
     cli_results = []
     wasm_results = []
 
     if args.cli_dir:
-        cli_results = load_results(Path(args.cli_dir))
+        cli_results = load_results(Path(args.cli_dir), args.processes)
     if args.wasm_dir:
-        wasm_results = load_results(Path(args.wasm_dir))
+        wasm_results = load_results(Path(args.wasm_dir), args.processes)
     if args.input_dir:
-        # Legacy mode: load all from single dir
-        all_results = load_results(Path(args.input_dir))
-        for r in all_results:
-            if r.get("platform") == "wasm":
-                wasm_results.append(r)
-            else:
-                cli_results.append(r)
+        legacy_cli, legacy_wasm = load_legacy_results(Path(args.input_dir), args.processes)
+        cli_results.extend(legacy_cli)
+        wasm_results.extend(legacy_wasm)
 
     print(f"Loaded {len(cli_results)} CLI results, {len(wasm_results)} WASM results")
 
     # Write outputs
-    write_markdown(cli_results, wasm_results, Path(args.output_md))
+    write_markdown(cli_results, wasm_results, Path(args.output_md), generated)
     write_csv(cli_results, wasm_results, Path(args.output_csv))
 
-    summary = generate_summary(cli_results, wasm_results)
-    with open(args.output_json, "w") as f:
-        json.dump(summary, f, indent=2)
+    summary = generate_summary(cli_results, wasm_results, generated)
+    Path(args.output_json).write_bytes(dumps_json(summary, indent=args.pretty))
 
     print(f"Saved: {args.output_md}, {args.output_csv}, {args.output_json}")
 
@@ -0,0 +1,127 @@
+"""
+Timing statistics shared by the CLI and WASM benchmark runners.
+"""
+
+import os
+import statistics
+
+# Below this many samples stdlib beats NumPy, whose import alone takes ~70 ms
+# (measured crossover: ~80 ms either way at 100k samples, numpy 2.x)
+NUMPY_MIN_SAMPLES = 100_000
+
+# The numba kernel is opt-in: statistics are computed once per process, so
+# the JIT compile (or cache load) is never amortized and NumPy is faster
+USE_NUMBA = os.environ.get("HYPHY_BENCH_NUMBA", "") == "1"
+
+# Compiled numba kernel: None until first use, False if numba is unavailable
+_numba_kernel = None
+
+
+def _fused_summary(values):
+    """Return (mean, stdev, min, max, median) of a float64 array in one pass.
+
+    Mean and variance use Welford's algorithm; the median sorts a copy once.
+    Written for numba's nopython mode.
+    """
+    n = values.size
+    mean = 0.0
+    m2 = 0.0
+    min_ = values[0]
+    max_ = values[0]
+    for i in range(n):
+        x = values[i]
+        delta = x - mean
+        mean += delta / (i + 1)
+        m2 += delta * (x - mean)
+        if x < min_:
+            min_ = x
+        if x > max_:
+            max_ = x
+    stdev = (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+
+    ordered = values.copy()
+    ordered.sort()
+    mid = n // 2
+    if n % 2 == 1:
+        median = ordered[mid]
+    else:
+        median = 0.5 * (ordered[mid - 1] + ordered[mid])
+    return mean, stdev, min_, max_, median
+
+
+def _summarize_numba(times: list[float]) -> dict | None:
+    """Compute statistics with the fused numba kernel, or return None if not enabled or unavailable."""
+    global _numba_kernel
+    if not USE_NUMBA or _numba_kernel is False:
+        return None
+
+    if _numba_kernel is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _numba_kernel = False
+            return None
+        _numba_kernel = njit(cache=True)(_fused_summary)
+
+    import numpy as np
+
+    mean, stdev, min_, max_, median = _numba_kernel(np.asarray(times, dtype=np.float64))
+    return {
+        "n": len(times),
+        "mean": float(mean),
+        "stdDev": float(stdev),
+        "min": float(min_),
+        "max": float(max_),
+        "median": float(median),
+    }
+
+
+def _summarize_numpy(times: list[float]) -> dict | None:
+    """Compute statistics with NumPy, or return None if it is not installed or not worth importing."""
+    if len(times) < NUMPY_MIN_SAMPLES:
+        return None
+
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    arr = np.fromiter(times, dtype=np.float64, count=len(times))
+    return {
+        "n": int(arr.size),
+        "mean": float(arr.mean()),
+        "stdDev": float(arr.std(ddof=1)) if arr.size > 1 else 0,
+        "min": float(arr.min()),
+        "max": float(arr.max()),
+        "median": float(np.median(arr)),
+    }
+
+
+def _summarize_stdlib(times: list[float]) -> dict:
+    """Compute statistics with the standard library."""
+    mean = statistics.fmean(times)
+    return {
+        "n": len(times),
+        "mean": mean,
+        "stdDev": statistics.stdev(times, xbar=mean) if len(times) > 1 else 0,
+        "min": min(times),
+        "max": max(times),
+        "median": statistics.median(times),
+    }
+
+
+def compute_statistics(iterations: list[dict]) -> dict:
+    """Summarize the runtimes of the successful iterations."""
+    successful_times = [it["runtimeMs"] for it in iterations if it["success"]]
+
+    if not successful_times:
+        return {"n": 0, "mean": None, "error": "All iterations failed"}
+
+    stats = (
+        _summarize_numba(successful_times)
+        or _summarize_numpy(successful_times)
+        or _summarize_stdlib(successful_times)
+    )
+    stats["standardError"] = stats["stdDev"] / (stats["n"] ** 0.5) if stats["n"] > 0 else 0
+    stats["cv"] = (stats["stdDev"] / stats["mean"] * 100) if stats["mean"] > 0 else 0
+    return stats
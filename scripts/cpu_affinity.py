@@ -0,0 +1,13 @@
+"""
+CPU availability shared by the benchmark runner and the aggregator.
+"""
+
+import os
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (its affinity mask, e.g. a SLURM allocation)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
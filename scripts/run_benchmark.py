@@ -7,18 +7,24 @@ Usage:
 """
 
 import argparse
-import json
+import asyncio
+import contextlib
+import functools
 import os
+import platform
 import subprocess
 import sys
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-import statistics
 
+from benchmark_stats import compute_statistics
+from cpu_affinity import available_cpus
+from json_io import dumps_json
 
-def run_hyphy(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: int) -> tuple[float, int]:
-    """Run HyPhy and return (runtime_ms, exit_code)."""
+
+def build_hyphy_command(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: int) -> list[str]:
+    """Build the HyPhy command line."""
 
     cmd = [hyphy_bin]
 
@@ -29,13 +35,26 @@ def run_hyphy(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: in
         cmd.append(f"LIBPATH={libpath}")
 
     cmd.extend([method, "--alignment", alignment])
+    return cmd
+
+
+def run_hyphy(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: int,
+              log_file=None) -> tuple[float, int]:
+    """Run HyPhy and return (runtime_ms, exit_code).
+
+    HyPhy's output is discarded unless `log_file` (an open file) is given.
+    """
+
+    cmd = build_hyphy_command(hyphy_bin, libpath, method, alignment, cpu)
 
     start_time = time.perf_counter()
 
+    output = log_file if log_file is not None else subprocess.DEVNULL
     result = subprocess.run(
         cmd,
-        capture_output=True,
-        text=True
+        stdout=output,
+        stderr=output,
+        check=False
     )
 
     end_time = time.perf_counter()
@@ -44,9 +63,48 @@ def run_hyphy(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: in
     return runtime_ms, result.returncode
 
 
+async def run_hyphy_async(hyphy_bin: str, libpath: str, method: str, alignment: str, cpu: int,
+                          log_file=None) -> tuple[float, int]:
+    """Run HyPhy as an asyncio subprocess and return (runtime_ms, exit_code)."""
+
+    cmd = build_hyphy_command(hyphy_bin, libpath, method, alignment, cpu)
+
+    start_time = time.perf_counter()
+
+    output = log_file if log_file is not None else asyncio.subprocess.DEVNULL
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=output,
+        stderr=output
+    )
+    exit_code = await process.wait()
+
+    end_time = time.perf_counter()
+    runtime_ms = (end_time - start_time) * 1000
+
+    return runtime_ms, exit_code
+
+
+async def run_hyphy_batch(count: int, *args) -> list[tuple[float, int]]:
+    """Run `count` concurrent HyPhy instances and return their (runtime_ms, exit_code)."""
+    return await asyncio.gather(*[run_hyphy_async(*args) for _ in range(count)])
+
+
+def limit_parallel_iterations(requested: int, cpu: int) -> int:
+    """Clamp concurrent runs so they do not oversubscribe the available CPUs."""
+    cpus = available_cpus()
+    per_run = cpu if cpu > 0 else cpus
+    allowed = max(1, cpus // per_run)
+    if requested > allowed:
+        print(f"Warning: --parallel-iterations {requested} would oversubscribe {cpus} CPUs "
+              f"at CPU={per_run} per run; using {allowed}", file=sys.stderr)
+        return allowed
+    return max(1, requested)
+
+
+@functools.lru_cache(maxsize=1)
 def get_system_info() -> dict:
-    """Get system information."""
-    import platform
+    """Get system information, probed once per process."""
 
     info = {
         "platform": platform.system(),
@@ -83,10 +141,15 @@ def main():
     parser.add_argument("--method", required=True, help="HyPhy method (fel, meme, slac, etc.)")
     parser.add_argument("--cpu", type=int, default=0, help="Number of CPUs (0 = all)")
     parser.add_argument("--iterations", type=int, default=3, help="Number of iterations")
+    parser.add_argument("--parallel-iterations", type=int, default=1,
+                        help="Run up to this many iterations concurrently (default: 1, sequential). "
+                             "Concurrent runs share memory bandwidth and cache, so their timings are "
+                             "inflated and should not be compared with sequential results")
     parser.add_argument("--hyphy-bin", default="hyphy", help="Path to HyPhy binary")
     parser.add_argument("--hyphy-libpath", default="", help="HyPhy LIBPATH")
     parser.add_argument("--sequences", type=int, default=0, help="Number of sequences")
     parser.add_argument("--sites", type=int, default=0, help="Number of sites")
+    parser.add_argument("--keep-logs", metavar="FILE", help="Append HyPhy stdout/stderr to FILE instead of discarding it")
     parser.add_argument("--output", required=True, help="Output JSON file")
 
     args = parser.parse_args()
@@ -104,44 +167,45 @@ def main():
     print(f"  Iterations: {args.iterations}")
 
     # Run benchmark iterations
-    iterations = []
-    for i in range(1, args.iterations + 1):
-        print(f"  Iteration {i}/{args.iterations}...", end=" ", flush=True)
-
-        runtime_ms, exit_code = run_hyphy(
-            args.hyphy_bin,
-            args.hyphy_libpath,
-            args.method,
-            args.alignment,
-            args.cpu
-        )
-
-        success = exit_code == 0
-        print(f"{runtime_ms:.0f}ms {'✓' if success else '✗'}")
-
-        iterations.append({
-            "iteration": i,
-            "runtimeMs": runtime_ms,
-            "success": success,
-            "exitCode": exit_code
-        })
+    if args.keep_logs:
+        Path(args.keep_logs).parent.mkdir(parents=True, exist_ok=True)
+
+    # Only the HyPhy child processes write to the log, so it is opened unbuffered
+    with open(args.keep_logs, "ab", buffering=0) if args.keep_logs else contextlib.nullcontext() as log_file:
+        hyphy_args = (args.hyphy_bin, args.hyphy_libpath, args.method, args.alignment, args.cpu, log_file)
+        parallel = limit_parallel_iterations(args.parallel_iterations, args.cpu)
+        if parallel > 1:
+            print(f"  Parallel iterations: {parallel}")
+
+        iterations = []
+        i = 1
+        while i <= args.iterations:
+            batch_size = min(parallel, args.iterations - i + 1)
+
+            if batch_size > 1:
+                print(f"  Iterations {i}-{i + batch_size - 1}/{args.iterations}...", flush=True)
+                runs = asyncio.run(run_hyphy_batch(batch_size, *hyphy_args))
+            else:
+                print(f"  Iteration {i}/{args.iterations}...", end=" ", flush=True)
+                runs = [run_hyphy(*hyphy_args)]
+
+            for runtime_ms, exit_code in runs:
+                success = exit_code == 0
+                if batch_size > 1:
+                    print(f"    Iteration {i}: ", end="")
+                print(f"{runtime_ms:.0f}ms {'✓' if success else '✗'}")
+
+                iterations.append({
+                    "iteration": i,
+                    "runtimeMs": runtime_ms,
+                    "success": success,
+                    "exitCode": exit_code,
+                    "parallelIterations": batch_size
+                })
+                i += 1
 
     # Calculate statistics
-    successful_times = [it["runtimeMs"] for it in iterations if it["success"]]
-
-    if successful_times:
-        stats = {
-            "n": len(successful_times),
-            "mean": statistics.mean(successful_times),
-            "stdDev": statistics.stdev(successful_times) if len(successful_times) > 1 else 0,
-            "min": min(successful_times),
-            "max": max(successful_times),
-            "median": statistics.median(successful_times),
-        }
-        stats["standardError"] = stats["stdDev"] / (stats["n"] ** 0.5) if stats["n"] > 0 else 0
-        stats["cv"] = (stats["stdDev"] / stats["mean"] * 100) if stats["mean"] > 0 else 0
-    else:
-        stats = {"n": 0, "mean": None, "error": "All iterations failed"}
+    stats = compute_statistics(iterations)
 
     # Build result
     result = {
@@ -150,18 +214,18 @@ def main():
         "cpu": args.cpu if args.cpu > 0 else "all",
         "sequences": args.sequences,
         "sites": args.sites,
+        "parallelIterations": parallel,
         "iterations": iterations,
         "statistics": stats,
-        "systemInfo": get_system_info(),
-        "timestamp": datetime.utcnow().isoformat() + "Z"
+        "systemInfo": dict(get_system_info()),
+        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     }
 
     # Write output
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w") as f:
-        json.dump(result, f, indent=2)
+    output_path.write_bytes(dumps_json(result))
 
     print(f"\nResults saved to: {args.output}")
 
@@ -8,12 +8,13 @@ Usage:
 
 import argparse
 import asyncio
-import json
 import sys
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-import statistics
+
+from benchmark_stats import compute_statistics
+from json_io import dumps_json
 
 try:
     from playwright.async_api import async_playwright
@@ -53,16 +54,23 @@ BENCHMARK_HTML = """
             window.benchmarkReady = true;
         }
 
-        async function runBenchmark(alignmentData, method) {
+        async function initAlignment(alignmentData) {
             if (!window.hyphyCli) throw new Error('HyPhy not initialized');
 
-            // Mount alignment file
+            // Mount alignment file once; iterations reuse the mounted path
             const inputFiles = await window.hyphyCli.mount([
                 { name: 'input.nex', data: alignmentData }
             ]);
+            window.alignmentPath = inputFiles[0];
+            return window.alignmentPath;
+        }
+
+        async function runBenchmark(method) {
+            if (!window.hyphyCli) throw new Error('HyPhy not initialized');
+            if (!window.alignmentPath) throw new Error('Alignment not mounted');
 
             // Run analysis
-            const command = `hyphy LIBPATH=/shared/hyphy/ ${method} ${inputFiles[0]}`;
+            const command = `hyphy LIBPATH=/shared/hyphy/ ${method} ${window.alignmentPath}`;
             const startTime = performance.now();
             const result = await window.hyphyCli.exec(command);
             await result.stdout;
@@ -116,15 +124,31 @@ async def run_wasm_benchmark(browser_type: str, alignment_path: Path, method: st
         hyphy_version = await page.evaluate("window.hyphyVersion")
         print(f"  HyPhy WASM version: {hyphy_version}", flush=True)
 
+        # Mount the alignment once; iterations run against the mounted path.
+        # A failed mount is recorded as failed iterations, like a failed run.
+        try:
+            await page.evaluate("data => initAlignment(data)", alignment_data)
+            mount_error = None
+        except Exception as e:
+            print(f"  Mounting alignment failed: {e}")
+            mount_error = str(e)
+
         # Run benchmark iterations
         results = []
         for i in range(1, iterations + 1):
+            if mount_error is not None:
+                results.append({
+                    "iteration": i,
+                    "runtimeMs": 0,
+                    "success": False,
+                    "error": mount_error
+                })
+                continue
+
             print(f"  Iteration {i}/{iterations}...", end=" ", flush=True)
 
             try:
-                result = await page.evaluate(
-                    f"runBenchmark({json.dumps(alignment_data)}, {json.dumps(method)})"
-                )
+                result = await page.evaluate("method => runBenchmark(method)", method)
                 print(f"{result['runtimeMs']:.0f}ms ✓")
                 results.append({
                     "iteration": i,
@@ -174,21 +198,7 @@ def main():
     )
 
     # Calculate statistics
-    successful_times = [it["runtimeMs"] for it in iterations if it["success"]]
-
-    if successful_times:
-        stats = {
-            "n": len(successful_times),
-            "mean": statistics.mean(successful_times),
-            "stdDev": statistics.stdev(successful_times) if len(successful_times) > 1 else 0,
-            "min": min(successful_times),
-            "max": max(successful_times),
-            "median": statistics.median(successful_times),
-        }
-        stats["standardError"] = stats["stdDev"] / (stats["n"] ** 0.5) if stats["n"] > 0 else 0
-        stats["cv"] = (stats["stdDev"] / stats["mean"] * 100) if stats["mean"] > 0 else 0
-    else:
-        stats = {"n": 0, "mean": None, "error": "All iterations failed"}
+    stats = compute_statistics(iterations)
 
     # Build result
     result = {
@@ -201,15 +211,14 @@ def main():
         "iterations": iterations,
         "statistics": stats,
         "hyphyVersion": hyphy_version,
-        "timestamp": datetime.utcnow().isoformat() + "Z"
+        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     }
 
     # Write output
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w") as f:
-        json.dump(result, f, indent=2)
+    output_path.write_bytes(dumps_json(result))
 
     print(f"\nResults saved to: {args.output}")
 